@@ -17,59 +17,249 @@ Usage:
     # Send alerts by severity level
     python send_mock_alerts.py --webhook <URL> --level ERROR
 
+    # Send alerts one at a time, 1 second apart, for watching them arrive
+    python send_mock_alerts.py --webhook <URL> --interactive
+
+    # Post alerts in batches of 20 as {"batch": [...]} bodies
+    python send_mock_alerts.py --webhook <URL> --batch --batch-size 20
+
+    # Multiplex alerts over one HTTP/2 connection (requires httpx[http2])
+    python send_mock_alerts.py --webhook <URL> --http2
+
     # List available mock alerts
     python send_mock_alerts.py --list
 """
 
 import argparse
+import concurrent.futures
+import gzip
 import json
 import os
+import pickle
+import queue
 import requests
+import socket
 import time
 import sys
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 MOCK_ALERTS_DIR = Path(__file__).parent / "mock_alerts"
 
+# Parsed alerts are cached here and reused until a mock alert file changes
+ALERT_CACHE_FILE = MOCK_ALERTS_DIR / ".cache.pickle"
+ALERT_CACHE_VERSION = 2
+
 # Default webhook URL (your n8n webhook)
 DEFAULT_WEBHOOK = "https://n8n.fourthfloor.solutions/webhook/dd771d80-d135-409c-a941-0f2010d7c426"
 
+# Request bodies at least this large are gzip-compressed before posting
+GZIP_MIN_BYTES = 1024
+
+# Transport errors raised by either HTTP client
+SEND_ERRORS = (requests.RequestException,) + ((httpx.HTTPError,) if httpx else ())
+
+
+def _dumps(obj) -> bytes:
+    """Serialize to compact UTF-8 JSON, using orjson when available."""
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _loads(data: bytes):
+    """Parse JSON bytes, using orjson when available."""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _encode_body(raw: bytes) -> tuple[bytes, dict]:
+    """Gzip a request body when it is large enough to benefit, returning it with any extra headers."""
+    if len(raw) >= GZIP_MIN_BYTES:
+        return gzip.compress(raw, compresslevel=1), {"Content-Encoding": "gzip"}
+    return raw, {}
+
+
+def _parse_alert(data: bytes) -> dict:
+    """Parse a mock alert file's contents."""
+    alert = _loads(data)
+    # Bodies never change after load, so encode them once up front
+    alert["_body_bytes"] = _dumps(alert["body"])
+    alert["_body_preview"] = alert["_body_bytes"][:80].decode(errors="replace")
+    return alert
+
+
+def _load_one(entry: os.DirEntry) -> tuple[str, dict]:
+    """Parse one mock alert file, returning its name and alert."""
+    with open(entry.path, "rb") as f:
+        return entry.name[:-len(".json")], _parse_alert(f.read())
+
+
+def load_one_alert(name: str) -> dict:
+    """Load a single mock alert by name, without reading the rest of the directory."""
+    with open(MOCK_ALERTS_DIR / f"{name}.json", "rb") as f:
+        return _parse_alert(f.read())
+
 
 def load_mock_alerts() -> dict:
-    """Load all mock alert files."""
-    alerts = {}
-    for file in MOCK_ALERTS_DIR.glob("*.json"):
-        with open(file) as f:
-            alert = json.load(f)
-            alerts[file.stem] = alert
+    """Load all mock alert files, reusing the parsed cache when none have changed."""
+    with os.scandir(MOCK_ALERTS_DIR) as it:
+        files = [entry for entry in it if entry.name.endswith(".json") and entry.is_file(follow_symlinks=False)]
+    # Every file's name, mtime and size, so renames and same-mtime copies
+    # invalidate the cache too
+    fingerprint = (
+        ALERT_CACHE_VERSION,
+        sorted(
+            (entry.name, stat.st_mtime_ns, stat.st_size)
+            for entry in files
+            for stat in (entry.stat(follow_symlinks=False),)
+        ),
+    )
+
+    try:
+        with open(ALERT_CACHE_FILE, "rb") as f:
+            # The fingerprint is pickled separately so a stale cache is
+            # rejected without unpickling the alerts themselves
+            if pickle.load(f) == fingerprint:
+                return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        pass
+
+    alerts = dict(map(_load_one, files))
+
+    try:
+        with open(ALERT_CACHE_FILE, "wb") as f:
+            pickle.dump(fingerprint, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(alerts, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass
+
     return alerts
 
 
-def send_alert(webhook_url: str, alert: dict, alert_name: str) -> bool:
-    """Send a single alert to the webhook."""
-    payload = alert["body"]
+class BurstHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter tuned for bursts of small, latency-sensitive webhook posts."""
+
+    socket_options = [
+        # Never let Nagle hold back a small alert body waiting for an ACK
+        (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+        (socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20),
+    ]
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+
+def create_session(http2: bool = False):
+    """
+    Create an HTTP session that keeps webhook connections alive between alerts.
+
+    With http2=True an httpx client is returned instead, which multiplexes
+    concurrent posts over a single connection.
+    """
+    if http2:
+        return httpx.Client(http2=True, timeout=10.0, headers={"Content-Type": "application/json"})
+
+    session = requests.Session()
+    # Large enough that --concurrency never waits on a free connection
+    adapter = BurstHTTPAdapter(pool_connections=4, pool_maxsize=32)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Content-Type": "application/json"})
+    return session
+
+
+def _post(session, webhook_url: str, data: bytes, headers: dict):
+    """POST a raw body with either HTTP client; httpx takes raw bytes as content=."""
+    if httpx and isinstance(session, httpx.Client):
+        return session.post(webhook_url, content=data, headers=headers, timeout=10)
+    return session.post(webhook_url, data=data, headers=headers, timeout=10)
+
+
+def send_alert(session, webhook_url: str, alert: dict, alert_name: str, outcomes: queue.SimpleQueue) -> bool:
+    """
+    Send a single alert to the webhook.
+
+    The outcome is queued on outcomes as (ok, level, name, detail) rather
+    than printed, so concurrent sends don't contend for stdout.
+    """
+    data, headers = _encode_body(alert["_body_bytes"])
 
     try:
-        response = requests.post(
-            webhook_url,
-            json=payload,
-            headers={"Content-Type": "application/json"},
-            timeout=10
-        )
+        response = _post(session, webhook_url, data, headers)
 
         if response.status_code in [200, 201, 202, 204]:
-            print(f"  ✓ [{alert['level']}] {alert_name}")
+            outcomes.put((True, alert["level"], alert_name, None))
             return True
         else:
-            print(f"  ✗ [{alert['level']}] {alert_name} - HTTP {response.status_code}")
+            outcomes.put((False, alert["level"], alert_name, f"HTTP {response.status_code}"))
             return False
 
-    except requests.RequestException as e:
-        print(f"  ✗ [{alert['level']}] {alert_name} - {e}")
+    except SEND_ERRORS as e:
+        outcomes.put((False, alert["level"], alert_name, str(e)))
         return False
 
 
+def send_batch(session, webhook_url: str, batch: list[tuple[str, dict]], outcomes: queue.SimpleQueue) -> bool:
+    """Send several alerts to the webhook in one request as {"batch": [...]}."""
+    # Splice the pre-encoded bodies rather than re-serializing them
+    raw = b'{"batch":[' + b",".join(alert["_body_bytes"] for _, alert in batch) + b"]}"
+    data, headers = _encode_body(raw)
+
+    try:
+        response = _post(session, webhook_url, data, headers)
+
+        if response.status_code in [200, 201, 202, 204]:
+            ok, detail = True, None
+        else:
+            ok, detail = False, f"HTTP {response.status_code}"
+
+    except SEND_ERRORS as e:
+        ok, detail = False, str(e)
+
+    for alert_name, alert in batch:
+        outcomes.put((ok, alert["level"], alert_name, detail))
+    return ok
+
+
+def write_outcomes(outcomes: queue.SimpleQueue):
+    """Drain queued send outcomes and write them to stdout in one call, ordered by alert name."""
+    drained = []
+    while not outcomes.empty():
+        drained.append(outcomes.get())
+
+    lines = []
+    for ok, level, alert_name, detail in sorted(drained, key=lambda outcome: outcome[2]):
+        if ok:
+            lines.append(f"  ✓ [{level}] {alert_name}")
+        else:
+            lines.append(f"  ✗ [{level}] {alert_name} - {detail}")
+
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+
+
+def positive_int(value: str) -> int:
+    """argparse type for options that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Send mock Synology alerts to webhook for testing",
@@ -99,15 +289,40 @@ Examples:
     parser.add_argument("--category", "-c", help="Filter by category (CMS, Storage, Hardware, etc.)")
     parser.add_argument("--level", "-l", choices=["INFO", "WARN", "ERROR"],
                         help="Filter by severity level")
-    parser.add_argument("--delay", "-d", type=float, default=1.0,
-                        help="Delay between alerts in seconds (default: 1)")
+    parser.add_argument("--delay", "-d", type=float,
+                        help="Delay between alerts in seconds, sending them one at a time "
+                             "(default: 0, or 1 with --interactive)")
+    parser.add_argument("--interactive", "-i", action="store_true",
+                        help="Pace alerts 1 second apart so they can be followed in n8n")
+    parser.add_argument("--concurrency", type=positive_int, default=8,
+                        help="Parallel sends when --delay is 0 (default: 8); the connection "
+                             "pool is sized and tuned (TCP_NODELAY) for bursts of up to 32")
+    parser.add_argument("--batch", action=argparse.BooleanOptionalAction, default=False,
+                        help="Post alerts together as a {\"batch\": [...]} array body (default: off)")
+    parser.add_argument("--batch-size", type=positive_int, default=50,
+                        help="Maximum alerts per batched request (default: 50)")
+    parser.add_argument("--http2", action="store_true",
+                        help="Send over HTTP/2 using httpx (pip install 'httpx[http2]')")
     parser.add_argument("--list", action="store_true", help="List available mock alerts")
     parser.add_argument("--dry-run", action="store_true", help="Show what would be sent without sending")
 
     args = parser.parse_args()
 
-    # Load alerts
-    alerts = load_mock_alerts()
+    # Alerts are sent concurrently unless a delay asks for them to be paced
+    if args.dry_run:
+        args.delay = 0.0
+    elif args.delay is None:
+        args.delay = 1.0 if args.interactive else 0.0
+
+    # Load alerts (only the requested file when a single type is asked for)
+    if args.type and not args.list:
+        try:
+            alerts = {args.type: load_one_alert(args.type)}
+        except FileNotFoundError:
+            print(f"No mock alert named '{args.type}' in {MOCK_ALERTS_DIR}")
+            return 1
+    else:
+        alerts = load_mock_alerts()
 
     if not alerts:
         print(f"No mock alerts found in {MOCK_ALERTS_DIR}")
@@ -135,19 +350,19 @@ Examples:
         print(f"\nTotal: {len(alerts)} alert types")
         return 0
 
-    # Filter alerts
-    filtered = {}
-    for name, alert in alerts.items():
-        # Filter by type
-        if args.type and name != args.type:
-            continue
-        # Filter by category
-        if args.category and alert.get("category", "").lower() != args.category.lower():
-            continue
-        # Filter by level
-        if args.level and alert.get("level") != args.level:
-            continue
-        filtered[name] = alert
+    # Filter alerts (the filter values are normalized once, not per alert)
+    alert_type = args.type or None
+    category = args.category.lower() if args.category else None
+    level = args.level or None
+
+    def matches(name: str, alert: dict) -> bool:
+        return (
+            (alert_type is None or name == alert_type)
+            and (category is None or alert.get("category", "").lower() == category)
+            and (level is None or alert.get("level") == level)
+        )
+
+    filtered = {name: alert for name, alert in alerts.items() if matches(name, alert)}
 
     if not filtered:
         print("No alerts match the specified filters")
@@ -163,20 +378,59 @@ Examples:
         print("\n[DRY RUN - Not actually sending]\n")
 
     results = {"success": 0, "failed": 0}
+    outcomes = queue.SimpleQueue()
 
-    for name, alert in sorted(filtered.items()):
-        if args.dry_run:
-            print(f"  Would send: [{alert['level']}] {name}")
-            print(f"    Payload: {json.dumps(alert['body'])[:80]}...")
-            results["success"] += 1
-        else:
-            if send_alert(args.webhook, alert, name):
-                results["success"] += 1
-            else:
-                results["failed"] += 1
+    try:
+        if args.http2 and httpx is None:
+            raise ImportError("httpx is not installed")
+        session = create_session(http2=args.http2)
+    except ImportError:
+        print("HTTP/2 support requires httpx with the h2 extra: pip install 'httpx[http2]'")
+        return 1
 
-            if args.delay > 0 and name != list(filtered.keys())[-1]:
-                time.sleep(args.delay)
+    with session:
+        if not args.dry_run and args.batch:
+            # Batches go out back to back; --delay only paces single alerts
+            items = sorted(filtered.items())
+            for start in range(0, len(items), args.batch_size):
+                batch = items[start:start + args.batch_size]
+                if send_batch(session, args.webhook, batch, outcomes):
+                    results["success"] += len(batch)
+                else:
+                    results["failed"] += len(batch)
+        elif not args.dry_run and args.delay == 0:
+            # No throttling requested, so the posts can overlap
+            with concurrent.futures.ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                futures = [
+                    executor.submit(send_alert, session, args.webhook, alert, name, outcomes)
+                    for name, alert in sorted(filtered.items())
+                ]
+                for future in concurrent.futures.as_completed(futures):
+                    if future.result():
+                        results["success"] += 1
+                    else:
+                        results["failed"] += 1
+        else:
+            names = sorted(filtered)
+            last = names[-1]
+            for name in names:
+                alert = filtered[name]
+                if args.dry_run:
+                    print(f"  Would send: [{alert['level']}] {name}")
+                    print(f"    Payload: {alert['_body_preview']}...")
+                    results["success"] += 1
+                else:
+                    if send_alert(session, args.webhook, alert, name, outcomes):
+                        results["success"] += 1
+                    else:
+                        results["failed"] += 1
+                    # Paced sends are meant to be watched, so report each one as it lands
+                    write_outcomes(outcomes)
+
+                    if args.delay > 0 and name != last:
+                        time.sleep(args.delay)
+
+    write_outcomes(outcomes)
 
     # Summary
     print("\n" + "="*70)
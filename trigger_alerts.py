@@ -12,10 +12,20 @@ If password is not provided, you'll be prompted to enter it.
 """
 
 import argparse
+import concurrent.futures
+import io
+import socket
 import subprocess
+import threading
 import time
 import getpass
 import sys
+from typing import Callable, Optional
+
+try:
+    import paramiko
+except ImportError:
+    paramiko = None
 # Known Synology notification APIs and their test methods
 NOTIFICATION_TESTS = {
     "push": {
@@ -53,41 +63,154 @@ EXPLORATORY_APIS = [
     "SYNO.SurveillanceStation.Notification",
 ]
 
+# Commands for the additional checks run after the notification tests
+HEALTH_CHECK_COMMAND = "synowebapi --exec api=SYNO.Core.System.Status method=get --version=1"
+BACKUP_LIST_COMMAND = "synowebapi --exec api=SYNO.Backup.Task method=list --version=1"
+
+# SYNO.API.Info query= value restricting discovery to notification APIs
+NOTIFICATION_API_QUERY = "SYNO.Core.Notification.,SYNO.SurveillanceStation.Notification"
+
+# Prefix of the lines that delimit each command's output in a pipelined run
+PIPELINE_MARKER = "#@@"
+
+# Multiplex every command over one SSH connection: the first command opens
+# the master and later ones skip the TCP + SSH handshake entirely
+SSH_CONTROL_PATH = "/tmp/ssh_mux_%h_%p_%r"
+SSH_MULTIPLEX_OPTIONS = [
+    "-o", "ControlMaster=auto",
+    "-o", f"ControlPath={SSH_CONTROL_PATH}",
+    "-o", "ControlPersist=60s",
+]
+
+# In-process SSH clients, one per (host, user), used when paramiko is installed
+_ssh_clients = {}
+_ssh_clients_lock = threading.Lock()
+
+
+def _get_ssh_client(host: str, user: str, password: str):
+    """Return the shared paramiko client for host/user, connecting on first use."""
+    with _ssh_clients_lock:
+        client = _ssh_clients.get((host, user))
+        if client is None:
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect(host, username=user, password=password, timeout=30)
+            _ssh_clients[(host, user)] = client
+        return client
+
+
+def _run_paramiko(client, command: str, line_filter: Optional[Callable[[str], bool]] = None,
+                  timeout: float = 30) -> tuple[int, str, str]:
+    """
+    Run a command over an open paramiko client, streaming stdout like _run_streaming.
+
+    On timeout, the stdout received so far is still returned.
+
+    Returns:
+        tuple: (return_code, stdout, stderr)
+    """
+    stdout = io.StringIO()
+    try:
+        _, stdout_file, stderr_file = client.exec_command(command, timeout=timeout)
+        for line in stdout_file:
+            if line_filter is None or line_filter(line):
+                stdout.write(line)
+        stderr = stderr_file.read().decode(errors="replace")
+        return stdout_file.channel.recv_exit_status(), stdout.getvalue(), stderr
+    except socket.timeout:
+        # Keep what arrived before the stall; callers can still use it
+        return -1, stdout.getvalue(), "Command timed out"
+    except paramiko.SSHException as e:
+        return -1, "", str(e)
+
+
+def _run_streaming(ssh_command: list, line_filter: Optional[Callable[[str], bool]] = None,
+                   timeout: float = 30) -> tuple[int, str, str]:
+    """
+    Run an SSH process, consuming its output line by line as it arrives.
+
+    Only lines accepted by line_filter are kept, so large remote output is
+    never held in memory in full. The process is killed after timeout seconds,
+    and the stdout read up to that point is still returned.
 
-def run_ssh_command(host: str, user: str, password: str, command: str, use_sudo: bool = True) -> tuple[int, str, str]:
+    Returns:
+        tuple: (return_code, stdout, stderr)
+    """
+    proc = subprocess.Popen(ssh_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+
+    # Drain stderr separately so a chatty stderr can't block stdout
+    stderr_chunks = []
+    stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(proc.stderr.read()))
+    stderr_reader.start()
+
+    stdout = io.StringIO()
+    try:
+        for line in proc.stdout:
+            if line_filter is None or line_filter(line):
+                stdout.write(line)
+        returncode = proc.wait()
+    finally:
+        timer.cancel()
+        stderr_reader.join()
+        proc.stdout.close()
+        proc.stderr.close()
+
+    if timed_out.is_set():
+        return -1, stdout.getvalue(), "Command timed out"
+    return returncode, stdout.getvalue(), "".join(stderr_chunks)
+
+
+def run_ssh_command(host: str, user: str, password: str, command: str, use_sudo: bool = True,
+                    line_filter: Optional[Callable[[str], bool]] = None,
+                    timeout: float = 30) -> tuple[int, str, str]:
     """
     Run a command on the Synology NAS via SSH.
 
+    If line_filter is given, only stdout lines it accepts are returned. The
+    command is abandoned after timeout seconds.
+
     Returns:
         tuple: (return_code, stdout, stderr)
     """
     if use_sudo:
         command = f"sudo {command}"
 
+    if paramiko:
+        # Reuse one in-process SSH transport instead of forking sshpass + ssh
+        try:
+            client = _get_ssh_client(host, user, password)
+        except (paramiko.SSHException, OSError) as e:
+            return -1, "", str(e)
+        return _run_paramiko(client, command, line_filter, timeout)
+
     ssh_command = [
         "sshpass", "-p", password,
         "ssh", "-o", "StrictHostKeyChecking=no",
         "-o", "UserKnownHostsFile=/dev/null",
+        *SSH_MULTIPLEX_OPTIONS,
         f"{user}@{host}",
         command
     ]
 
     try:
-        result = subprocess.run(
-            ssh_command,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        return result.returncode, result.stdout, result.stderr
-    except subprocess.TimeoutExpired:
-        return -1, "", "Command timed out"
+        return _run_streaming(ssh_command, line_filter, timeout)
     except FileNotFoundError:
         # sshpass not installed, try with expect or manual
-        return run_ssh_without_sshpass(host, user, command)
+        return run_ssh_without_sshpass(host, user, command, line_filter, timeout)
 
 
-def run_ssh_without_sshpass(host: str, user: str, command: str) -> tuple[int, str, str]:
+def run_ssh_without_sshpass(host: str, user: str, command: str,
+                            line_filter: Optional[Callable[[str], bool]] = None,
+                            timeout: float = 30) -> tuple[int, str, str]:
     """
     Fallback SSH method when sshpass is not available.
     Uses subprocess with stdin for password (less reliable).
@@ -97,24 +220,34 @@ def run_ssh_without_sshpass(host: str, user: str, command: str) -> tuple[int, st
     ssh_command = [
         "ssh", "-o", "StrictHostKeyChecking=no",
         "-o", "UserKnownHostsFile=/dev/null",
+        *SSH_MULTIPLEX_OPTIONS,
         f"{user}@{host}",
         command
     ]
 
+    return _run_streaming(ssh_command, line_filter, timeout)
+
+
+def close_ssh_connection(host: str, user: str):
+    """Shut down the shared SSH connection, if one is open."""
+    with _ssh_clients_lock:
+        client = _ssh_clients.pop((host, user), None)
+    if client is not None:
+        client.close()
+        return
+
     try:
-        result = subprocess.run(
-            ssh_command,
+        subprocess.run(
+            ["ssh", "-o", f"ControlPath={SSH_CONTROL_PATH}", "-O", "exit", f"{user}@{host}"],
             capture_output=True,
-            text=True,
-            timeout=30
+            timeout=10
         )
-        return result.returncode, result.stdout, result.stderr
-    except subprocess.TimeoutExpired:
-        return -1, "", "Command timed out"
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        pass
 
 
 def test_ssh_connection(host: str, user: str, password: str) -> bool:
-    """Test if SSH connection works."""
+    """Test if SSH connection works (this also opens the shared master connection)."""
     print(f"Testing SSH connection to {host}...")
     code, stdout, stderr = run_ssh_command(host, user, password, "echo 'Connection successful'", use_sudo=False)
 
@@ -126,38 +259,93 @@ def test_ssh_connection(host: str, user: str, password: str) -> bool:
         return False
 
 
-def trigger_notification_test(host: str, user: str, password: str, test_name: str, test_config: dict) -> bool:
-    """Trigger a specific notification test."""
-    api = test_config["api"]
-    method = test_config["method"]
-    version = test_config["version"]
-    description = test_config["description"]
-
-    print(f"\n[{test_name.upper()}] {description}")
-    print(f"  API: {api}")
-    print(f"  Method: {method}")
-
-    command = f'synowebapi --exec api={api} method={method} --version={version}'
+def notification_test_command(test_config: dict) -> str:
+    """Build the synowebapi command for a notification test."""
+    return f'synowebapi --exec api={test_config["api"]} method={test_config["method"]} --version={test_config["version"]}'
 
-    code, stdout, stderr = run_ssh_command(host, user, password, command)
 
+def report_notification_test(test_name: str, test_config: dict, code: int, stdout: str, stderr: str) -> bool:
+    """Print the outcome of a notification test and return whether it succeeded."""
+    # Printed as one block so concurrent tests don't interleave their output
+    header = (f"\n[{test_name.upper()}] {test_config['description']}"
+              f"\n  API: {test_config['api']}\n  Method: {test_config['method']}")
     if code == 0:
-        print(f"  ✓ Success: {stdout.strip()}")
+        print(f"{header}\n  ✓ Success: {stdout.strip()}")
         return True
     else:
-        print(f"  ✗ Failed: {stderr.strip() or stdout.strip()}")
+        print(f"{header}\n  ✗ Failed: {stderr.strip() or stdout.strip()}")
         return False
 
 
+def trigger_notification_test(host: str, user: str, password: str, test_name: str, test_config: dict) -> bool:
+    """Trigger a specific notification test."""
+    code, stdout, stderr = run_ssh_command(host, user, password, notification_test_command(test_config))
+    return report_notification_test(test_name, test_config, code, stdout, stderr)
+
+
+def run_pipelined_commands(host: str, user: str, password: str, commands: dict,
+                           delay: float = 0.0) -> dict:
+    """
+    Run several sudo commands in a single SSH round trip.
+
+    Each command's output is bracketed by marker lines carrying its name and
+    exit status, so results can be attributed back to it. Output is merged
+    with stderr on the remote side.
+
+    Returns:
+        dict: name -> (return_code, stdout, stderr)
+    """
+    steps = []
+    for name, command in commands.items():
+        if steps and delay > 0:
+            steps.append(f"sleep {delay}")
+        # The bare echo keeps the end marker on its own line even when the
+        # command's output has no trailing newline; it's stripped again below
+        steps.append(f'echo "{PIPELINE_MARKER} begin {name}"; sudo {command} 2>&1; '
+                     f'__rc=$?; echo; echo "{PIPELINE_MARKER} end {name} $__rc"')
+
+    # Each command gets the usual 30s, plus the sleeps between them
+    timeout = 30 * len(commands) + max(delay, 0) * (len(commands) - 1)
+    code, stdout, stderr = run_ssh_command(host, user, password, " ; ".join(steps), use_sudo=False,
+                                           timeout=timeout)
+
+    results = {}
+    current, output = None, []
+    for line in stdout.splitlines(keepends=True):
+        if line.startswith(f"{PIPELINE_MARKER} begin "):
+            current, output = line.split()[-1], []
+        elif line.startswith(f"{PIPELINE_MARKER} end ") and current:
+            rc = int(line.split()[-1])
+            text = "".join(output)[:-1]
+            results[current] = (rc, text, "" if rc == 0 else text)
+            current = None
+        elif current:
+            output.append(line)
+
+    # Anything without an end marker never ran (e.g. the SSH session failed)
+    for name in commands:
+        results.setdefault(name, (code or -1, "", stderr or "Command did not run"))
+
+    return results
+
+
 def list_available_apis(host: str, user: str, password: str):
     """List available notification-related APIs on the NAS."""
     print("\n" + "="*60)
     print("Discovering available APIs...")
     print("="*60)
 
-    # Try to get API info
-    command = 'synowebapi --exec api=SYNO.API.Info method=query --version=1 2>/dev/null | grep -i notif'
-    _, stdout, _ = run_ssh_command(host, user, password, command)
+    def is_notification_line(line: str) -> bool:
+        return "notif" in line.lower()
+
+    # Ask only for the notification APIs so the full catalog isn't sent over SSH
+    command = f'synowebapi --exec api=SYNO.API.Info method=query query={NOTIFICATION_API_QUERY} --version=1 2>/dev/null'
+    _, stdout, _ = run_ssh_command(host, user, password, command, line_filter=is_notification_line)
+
+    if not stdout:
+        # Older DSM ignores query=, so filter the full dump as it streams in
+        command = 'synowebapi --exec api=SYNO.API.Info method=query --version=1 2>/dev/null'
+        _, stdout, _ = run_ssh_command(host, user, password, command, line_filter=is_notification_line)
 
     if stdout:
         print("Found notification-related APIs:")
@@ -166,31 +354,32 @@ def list_available_apis(host: str, user: str, password: str):
         print("Could not enumerate APIs (this is normal on some DSM versions)")
 
 
+def report_backup_event(code: int, stdout: str, stderr: str):
+    """Print the outcome of the backup task listing."""
+    if code == 0:
+        print(f"\n[BACKUP] Checking backup tasks...\n  Backup tasks found: {len(stdout.strip())} bytes response")
+    else:
+        print(f"\n[BACKUP] Checking backup tasks...\n  Could not list backup tasks: {stderr.strip()}")
+
+
 def trigger_backup_event(host: str, user: str, password: str):
     """Attempt to trigger a backup-related notification."""
-    print("\n[BACKUP] Checking backup tasks...")
+    code, stdout, stderr = run_ssh_command(host, user, password, BACKUP_LIST_COMMAND)
+    report_backup_event(code, stdout, stderr)
 
-    # List backup tasks
-    command = 'synowebapi --exec api=SYNO.Backup.Task method=list --version=1'
-    code, stdout, stderr = run_ssh_command(host, user, password, command)
 
+def report_system_health_check(code: int, stderr: str):
+    """Print the outcome of the system health check."""
     if code == 0:
-        print(f"  Backup tasks found: {len(stdout.strip())} bytes response")
+        print("\n[HEALTH] Triggering system health check...\n  ✓ Health check completed")
     else:
-        print(f"  Could not list backup tasks: {stderr.strip()}")
+        print(f"\n[HEALTH] Triggering system health check...\n  ✗ Failed: {stderr.strip()}")
 
 
 def trigger_system_health_check(host: str, user: str, password: str):
     """Trigger system health notification."""
-    print("\n[HEALTH] Triggering system health check...")
-
-    command = 'synowebapi --exec api=SYNO.Core.System.Status method=get --version=1'
-    code, _, stderr = run_ssh_command(host, user, password, command)
-
-    if code == 0:
-        print("  ✓ Health check completed")
-    else:
-        print(f"  ✗ Failed: {stderr.strip()}")
+    code, _, stderr = run_ssh_command(host, user, password, HEALTH_CHECK_COMMAND)
+    report_system_health_check(code, stderr)
 
 
 def send_custom_webhook_test(host: str, user: str, password: str, message: str):
@@ -222,6 +411,14 @@ def send_custom_webhook_test(host: str, user: str, password: str, message: str):
             return False
 
 
+def positive_int(value: str) -> int:
+    """argparse type for options that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Trigger Synology NAS notifications for webhook testing",
@@ -251,6 +448,10 @@ Examples:
     parser.add_argument("--list", "-l", action="store_true", help="List available tests")
     parser.add_argument("--delay", "-d", type=float, default=2.0,
                         help="Delay between tests in seconds (default: 2)")
+    parser.add_argument("--concurrency", type=positive_int, default=4,
+                        help="Parallel tests when --delay is 0 (default: 4)")
+    parser.add_argument("--pipeline", action=argparse.BooleanOptionalAction, default=True,
+                        help="Run all tests in a single SSH command (default: on)")
     parser.add_argument("--discover", action="store_true", help="Discover available APIs")
 
     args = parser.parse_args()
@@ -286,51 +487,88 @@ Examples:
         print("  - SSH is enabled on your NAS (Control Panel → Terminal & SNMP)")
         print("  - Username and password are correct")
         print("  - The user has admin privileges")
+        close_ssh_connection(args.host, args.user)
         return 1
 
-    # Discover APIs if requested
-    if args.discover:
-        list_available_apis(args.host, args.user, password)
-
-    # Send custom message if provided
-    if args.custom:
-        send_custom_webhook_test(args.host, args.user, password, args.custom)
-        return 0
+    try:
+        # Discover APIs if requested
+        if args.discover:
+            list_available_apis(args.host, args.user, password)
 
-    # Run tests
-    results = {"success": 0, "failed": 0}
+        # Send custom message if provided
+        if args.custom:
+            send_custom_webhook_test(args.host, args.user, password, args.custom)
+            return 0
 
-    if args.test == "all":
-        tests_to_run = NOTIFICATION_TESTS.items()
-    else:
-        tests_to_run = [(args.test, NOTIFICATION_TESTS[args.test])]
+        # Run tests
+        results = {"success": 0, "failed": 0}
 
-    for test_name, test_config in tests_to_run:
-        success = trigger_notification_test(args.host, args.user, password, test_name, test_config)
-
-        if success:
-            results["success"] += 1
+        if args.test == "all":
+            tests_to_run = NOTIFICATION_TESTS.items()
         else:
-            results["failed"] += 1
-
-        # Delay between tests
-        if args.delay > 0:
-            time.sleep(args.delay)
-
-    # Additional checks
-    trigger_system_health_check(args.host, args.user, password)
-    trigger_backup_event(args.host, args.user, password)
-
-    # Summary
-    print("\n" + "="*60)
-    print("Summary")
-    print("="*60)
-    print(f"  Successful: {results['success']}")
-    print(f"  Failed:     {results['failed']}")
-    print("\nCheck your n8n webhook to see captured alerts!")
-
-    return 0 if results["failed"] == 0 else 1
-
+            tests_to_run = [(args.test, NOTIFICATION_TESTS[args.test])]
+
+        if args.pipeline:
+            # One SSH round trip for everything; the delay is applied remotely
+            commands = {name: notification_test_command(config) for name, config in tests_to_run}
+            commands["_health"] = HEALTH_CHECK_COMMAND
+            commands["_backup"] = BACKUP_LIST_COMMAND
+            outputs = run_pipelined_commands(args.host, args.user, password, commands, delay=args.delay)
+
+            for test_name, test_config in tests_to_run:
+                if report_notification_test(test_name, test_config, *outputs[test_name]):
+                    results["success"] += 1
+                else:
+                    results["failed"] += 1
+
+            code, _, stderr = outputs["_health"]
+            report_system_health_check(code, stderr)
+            report_backup_event(*outputs["_backup"])
+        elif args.delay == 0:
+            # No pacing requested, so run the independent probes side by side;
+            # they all share the multiplexed SSH connection
+            with concurrent.futures.ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                futures = [
+                    executor.submit(trigger_notification_test, args.host, args.user, password, test_name, test_config)
+                    for test_name, test_config in tests_to_run
+                ]
+                executor.submit(trigger_system_health_check, args.host, args.user, password)
+                executor.submit(trigger_backup_event, args.host, args.user, password)
+
+                for future in concurrent.futures.as_completed(futures):
+                    if future.result():
+                        results["success"] += 1
+                    else:
+                        results["failed"] += 1
+        else:
+            for test_name, test_config in tests_to_run:
+                success = trigger_notification_test(args.host, args.user, password, test_name, test_config)
+
+                if success:
+                    results["success"] += 1
+                else:
+                    results["failed"] += 1
+
+                # Delay between tests
+                if args.delay > 0:
+                    time.sleep(args.delay)
+
+            # Additional checks
+            trigger_system_health_check(args.host, args.user, password)
+            trigger_backup_event(args.host, args.user, password)
+
+        # Summary
+        print("\n" + "="*60)
+        print("Summary")
+        print("="*60)
+        print(f"  Successful: {results['success']}")
+        print(f"  Failed:     {results['failed']}")
+        print("\nCheck your n8n webhook to see captured alerts!")
+
+        return 0 if results["failed"] == 0 else 1
+
+    finally:
+        close_ssh_connection(args.host, args.user)
 
 if __name__ == "__main__":
     sys.exit(main())
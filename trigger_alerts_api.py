@@ -13,72 +13,383 @@ Usage:
 """
 
 import argparse
+import concurrent.futures
+import functools
 import requests
 import urllib3
 import time
 import getpass
 import json
+import logging
+import logging.handlers
+import queue
+import re
+import ssl
 import sys
+import threading
+from pathlib import Path
+from urllib.parse import urlencode
 from typing import Optional, Any
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 # Disable SSL warnings for self-signed certs
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Concurrent API calls; matches the HTTP connection pool size
+MAX_WORKERS = 8
+
+# SYNO.API.Auth version used when the NAS doesn't report its maximum in time
+AUTH_VERSION = 6
+WARMUP_TIMEOUT = 5
+
+# Headers sent with every API request
+REQUEST_HEADERS = {
+    "User-Agent": "SynologyNotificationTrigger",
+    "Accept": "application/json"
+}
+FORM_HEADERS = {**REQUEST_HEADERS, "Content-Type": "application/x-www-form-urlencoded"}
+
+# On-disk cache for the notification APIs in the SYNO.API.Info listing,
+# which rarely changes between runs
+CACHE_DIR = Path.home() / ".cache" / "synology-alerts"
+CACHE_TTL = 24 * 3600
+
+# Matches API names that look notification-related
+_NOTIF_RE = re.compile(r"notif|alert|push|mail|sms|webhook", re.IGNORECASE).search
+
+# Progress output goes through this logger. The default handler prints each
+# message to stdout, so the class reports as before when imported as a
+# library; main() swaps it for a queued handler with start_logging().
+logger = logging.getLogger("synology-alerts")
+_stdout_handler = logging.StreamHandler(sys.stdout)
+_stdout_handler.setFormatter(logging.Formatter("%(message)s"))
+logger.addHandler(_stdout_handler)
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+# Notification channel tests, sent via each API's send_test method.
+# enabled_flag is the key in the channel's .Conf that says whether it's switched on.
+NOTIFICATION_TESTS = {
+    "webhook": {
+        "api": "SYNO.Core.Notification.Push.Webhook.Provider",
+        "version": 2,
+        "header": "[WEBHOOK] Sending webhook test (profile_id={profile_id})...",
+        "success": "Webhook notification test sent"
+    },
+    "push": {
+        "api": "SYNO.Core.Notification.Push",
+        "version": 1,
+        "header": "[PUSH] Sending push notification test...",
+        "success": "Push notification test sent",
+        "enabled_flag": "enable_push_service"
+    },
+    "sms": {
+        "api": "SYNO.Core.Notification.SMS",
+        "version": 1,
+        "header": "[SMS] Sending SMS notification test...",
+        "success": "SMS notification test sent",
+        "enabled_flag": "enable"
+    },
+    "mail": {
+        "api": "SYNO.Core.Notification.Mail",
+        "version": 1,
+        "header": "[MAIL] Sending email notification test...",
+        "success": "Email notification test sent",
+        "enabled_flag": "enable"
+    },
+}
+
+
+def _loads(data: bytes):
+    """Parse JSON bytes, using orjson when available."""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def create_ssl_context() -> ssl.SSLContext:
+    """
+    Create the TLS context shared by every connection to the NAS.
+
+    Certificates aren't verified, since DSM usually serves a self-signed one.
+    """
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    context.options |= ssl.OP_NO_RENEGOTIATION
+    return context
+
+
+class SSLContextAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools all use one SSLContext."""
+
+    def __init__(self, ssl_context: ssl.SSLContext, **kwargs):
+        # Set before super().__init__, which builds the pool manager
+        self.ssl_context = ssl_context
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["ssl_context"] = self.ssl_context
+        super().init_poolmanager(*args, **kwargs)
+
+
+def start_logging() -> logging.handlers.QueueListener:
+    """
+    Route the script's output through a queue drained by one listener thread.
+
+    Worker threads only enqueue records, and each record (even a multi-line
+    one) is written in one go, so concurrent output never interleaves.
+    """
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, _stdout_handler)
+
+    logger.removeHandler(_stdout_handler)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener.start()
+    return listener
+
 
 class SynologyNotificationTrigger:
     """Class to trigger various notifications on Synology NAS."""
 
-    def __init__(self, host: str, port: int, username: str, password: str, secure: bool = False):
+    def __init__(self, host: str, port: int, username: str, password: str, secure: bool = False,
+                 compat: bool = False):
         self.host = host
         self.port = port
         self.username = username
         self.password = password
         self.secure = secure
         self.session_id: Optional[str] = None
+        self._sid_pair: tuple = ()
+        self._last_call = 0.0
         self.base_url = f"{'https' if secure else 'http'}://{host}:{port}/webapi"
+        self._urls = {path: f"{self.base_url}/{path}" for path in ("auth.cgi", "entry.cgi", "query.cgi")}
+
+        # One keep-alive connection pool for every call, so HTTPS pays a single
+        # TLS handshake. urllib3 is used directly unless compat asks for requests.
+        # Only failed connects are retried. Every call is a POST, and resending
+        # one that reached the NAS could fire a duplicate send_test notification.
+        retries = urllib3.Retry(total=2)
+        ssl_context = create_ssl_context()
+        self._pool: Optional[urllib3.PoolManager] = None
+        self._session: Optional[requests.Session] = None
+        if compat:
+            self._session = requests.Session()
+            adapter = SSLContextAdapter(
+                ssl_context, pool_connections=4, pool_maxsize=MAX_WORKERS, max_retries=retries
+            )
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
+            self._session.headers.update(REQUEST_HEADERS)
+        else:
+            self._pool = urllib3.PoolManager(
+                num_pools=2,
+                maxsize=MAX_WORKERS,
+                cert_reqs="CERT_NONE",
+                ssl_context=ssl_context,
+                retries=retries
+            )
 
-    def _request(self, api: str, path: str, method: str, version: int = 1, **params) -> dict:
-        """Make an API request to the Synology NAS."""
-        url = f"{self.base_url}/{path}"
+        # Open a pooled connection and look up the Auth API version while the
+        # caller gets ready to log in
+        self._auth_version = AUTH_VERSION
+        self._warmup = threading.Thread(target=self._warm_up, daemon=True)
+        self._warmup.start()
 
-        data = {
-            "api": api,
-            "version": version,
-            "method": method,
-            **params
-        }
+    def _body(self, api: str, method: str, version: int, params: tuple) -> tuple:
+        """Build a request's form body as a tuple of (key, value) pairs."""
+        return (("api", api), ("version", str(version)), ("method", method)) + params + self._sid_pair
 
-        if self.session_id:
-            data["_sid"] = self.session_id
+    def _request(self, api: str, path: str, method: str, version: int = 1, params: tuple = ()) -> dict:
+        """
+        Make an API request to the Synology NAS.
+
+        params is a tuple of (key, value) pairs, appended to the form body
+        after api, version and method.
+        """
+        body = self._body(api, method, version, params)
+        url = self._urls[path]
 
         try:
-            response = requests.post(url, data=data, verify=False, timeout=30)
+            if self._session is not None:
+                response = self._session.post(url, data=body, verify=False, timeout=30, stream=False)
+                response.raise_for_status()
+                content = response.content
+            else:
+                response = self._pool.request("POST", url, body=urlencode(body), headers=FORM_HEADERS, timeout=30)
+                if response.status >= 400:
+                    return {"success": False, "error": f"HTTP {response.status} for url: {url}"}
+                content = response.data
+            # Parse the body bytes directly rather than decoding to text first
+            return _loads(content)
+        except (requests.RequestException, urllib3.exceptions.HTTPError, ValueError) as e:
+            return {"success": False, "error": str(e)}
+
+    def _open(self, path: str, body: tuple) -> urllib3.BaseHTTPResponse:
+        """
+        POST a form body and return the response with its content still unread.
+
+        The caller must release the connection once done with the response.
+        Raises requests/urllib3 errors, including for HTTP error statuses.
+        """
+        url = self._urls[path]
+        if self._session is not None:
+            response = self._session.post(url, data=body, verify=False, timeout=30, stream=True)
+            if not response.ok:
+                response.close()
             response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            response.raw.decode_content = True
+            return response.raw
+
+        response = self._pool.request(
+            "POST", url, body=urlencode(body), headers=FORM_HEADERS, timeout=30, preload_content=False
+        )
+        if response.status >= 400:
+            response.release_conn()
+            raise urllib3.exceptions.HTTPError(f"HTTP {response.status} for url: {url}")
+        return response
+
+    def _request_streaming(self, api: str, path: str, method: str, version: int = 1,
+                           params: tuple = (), keep=None) -> dict:
+        """
+        Make an API request and stream-parse the entries of its "data" object.
+
+        Only entries whose name passes keep() end up in the result, so large
+        listings are never held in memory whole. Falls back to a buffered
+        _request when ijson isn't installed.
+        """
+        if ijson is None:
+            result = self._request(api, path, method, version, params)
+            if keep is not None and result.get("success"):
+                result["data"] = {name: entry for name, entry in result.get("data", {}).items() if keep(name)}
+            return result
+
+        body = self._body(api, method, version, params)
+        status = {}
+
+        def watch(events):
+            # "success" and "error" can come after "data", so pick them up in passing
+            for prefix, event, value in events:
+                if prefix == "success":
+                    status["success"] = value
+                elif prefix == "error.code":
+                    status["error"] = {"code": value}
+                yield prefix, event, value
+
+        try:
+            response = self._open(path, body)
+            try:
+                events = watch(ijson.parse(response, use_float=True))
+                data = {
+                    name: entry
+                    for name, entry in ijson.kvitems(events, "data")
+                    if keep is None or keep(name)
+                }
+            finally:
+                # Discard anything unread so the connection can be reused
+                response.drain_conn()
+                response.release_conn()
+        except (requests.RequestException, urllib3.exceptions.HTTPError, ijson.JSONError) as e:
             return {"success": False, "error": str(e)}
 
+        if not status.get("success"):
+            return {"success": False, "error": status.get("error", "Unknown error")}
+        return {"success": True, "data": data}
+
+    def _paced(self, delay: float):
+        """Wait until `delay` seconds have passed since the previous paced call."""
+        wait = self._last_call + delay - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_call = time.monotonic()
+
+    def _run_parallel(self, calls: dict, stagger: float = 0.0) -> dict:
+        """
+        Run independent API calls concurrently over the shared connection pool.
+
+        Args:
+            calls: label -> zero-argument callable
+            stagger: minimum seconds between dispatching calls
+
+        Returns:
+            dict: label -> result
+        """
+        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = {}
+            for label, call in calls.items():
+                if stagger > 0:
+                    self._paced(stagger)
+                futures[label] = executor.submit(call)
+            return {label: future.result() for label, future in futures.items()}
+
+    def _compound_request(self, calls: list[dict]) -> dict:
+        """
+        Run several API methods in one round trip via SYNO.Entry.Request.
+
+        Each call is a dict with api, method, version and optional params.
+        Per-call results are in result["data"]["result"], in order.
+        """
+        compound = [
+            {"api": c["api"], "method": c["method"], "version": c["version"], **c.get("params", {})}
+            for c in calls
+        ]
+        return self._request(
+            api="SYNO.Entry.Request",
+            path="entry.cgi",
+            method="request",
+            version=1,
+            params=(("stop_when_error", "false"), ("compound", json.dumps(compound)))
+        )
+
+    def _warm_up(self):
+        """Query the SYNO.API.Auth version range, leaving a connection open in the pool."""
+        result = self._request(
+            api="SYNO.API.Info",
+            path="query.cgi",
+            method="query",
+            version=1,
+            params=(("query", "SYNO.API.Auth"),)
+        )
+        if result.get("success"):
+            max_version = result.get("data", {}).get("SYNO.API.Auth", {}).get("maxVersion")
+            if max_version:
+                self._auth_version = max_version
+
     def login(self) -> bool:
         """Authenticate with the NAS."""
-        print(f"Logging in to {self.host}...")
+        logger.info(f"Logging in to {self.host}...")
 
+        self._warmup.join(WARMUP_TIMEOUT)
         result = self._request(
             api="SYNO.API.Auth",
             path="auth.cgi",
             method="login",
-            version=6,
-            account=self.username,
-            passwd=self.password,
-            session="NotificationTrigger",
-            format="sid"
+            version=self._auth_version,
+            params=(
+                ("account", self.username),
+                ("passwd", self.password),
+                ("session", "NotificationTrigger"),
+                ("format", "sid"),
+            )
         )
 
         if result.get("success"):
             self.session_id = result["data"]["sid"]
-            print("  ✓ Login successful")
+            self._sid_pair = (("_sid", self.session_id),)
+            logger.info("  ✓ Login successful")
             return True
         else:
-            print(f"  ✗ Login failed: {result.get('error', 'Unknown error')}")
+            logger.info(f"  ✗ Login failed: {result.get('error', 'Unknown error')}")
             return False
 
     def logout(self):
@@ -89,10 +400,41 @@ class SynologyNotificationTrigger:
                 path="auth.cgi",
                 method="logout",
                 version=1,
-                session="NotificationTrigger"
+                params=(("session", "NotificationTrigger"),)
             )
             self.session_id = None
-            print("Logged out")
+            self._sid_pair = ()
+            logger.info("Logged out")
+
+    def close(self):
+        """Close the underlying HTTP connections."""
+        if self._session is not None:
+            self._session.close()
+        else:
+            self._pool.clear()
+
+    def _cache_path(self, name: str) -> Path:
+        """Path of a per-NAS cache file."""
+        return CACHE_DIR / f"{name}_{self.host}_{self.port}.json"
+
+    def _cache_load(self, name: str) -> Optional[dict]:
+        """Load a cached response, or None if it is missing, stale or unreadable."""
+        path = self._cache_path(name)
+        try:
+            if time.time() - path.stat().st_mtime > CACHE_TTL:
+                return None
+            return _loads(path.read_bytes())
+        except (OSError, ValueError):
+            return None
+
+    def _cache_store(self, name: str, data: dict):
+        """Write a response to the cache; failures are ignored."""
+        path = self._cache_path(name)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(orjson.dumps(data) if orjson else json.dumps(data).encode())
+        except OSError:
+            pass
 
     def get_api_info(self) -> dict:
         """Get available API information."""
@@ -101,49 +443,43 @@ class SynologyNotificationTrigger:
             path="query.cgi",
             method="query",
             version=1,
-            query="all"
-        )
-
-    def test_push_notification(self) -> dict:
-        """Send a test push notification."""
-        print("\n[PUSH] Sending push notification test...")
-
-        result = self._request(
-            api="SYNO.Core.Notification.Push",
-            path="entry.cgi",
-            method="send_test",
-            version=1
+            params=(("query", "all"),)
         )
 
+    def _report_test(self, channel: str, result: dict, **params) -> dict:
+        """Print the outcome of a notification channel test."""
+        test = NOTIFICATION_TESTS[channel]
+        header = "\n" + test["header"].format(**params)
         if result.get("success"):
-            print("  ✓ Push notification test sent")
+            logger.info(f"{header}\n  ✓ {test['success']}")
         else:
-            print(f"  ✗ Failed: {result.get('error', result)}")
+            logger.info(f"{header}\n  ✗ Failed: {result.get('error', result)}")
 
         return result
 
-    def test_webhook_notification(self, profile_id: int = 1) -> dict:
-        """Send a test notification via webhook provider."""
-        print(f"\n[WEBHOOK] Sending webhook test (profile_id={profile_id})...")
-
+    def _send_test(self, channel: str, **params) -> dict:
+        """Send a test notification through one channel."""
+        test = NOTIFICATION_TESTS[channel]
         result = self._request(
-            api="SYNO.Core.Notification.Push.Webhook.Provider",
+            api=test["api"],
             path="entry.cgi",
             method="send_test",
-            version=2,
-            profile_id=profile_id
+            version=test["version"],
+            params=tuple(params.items())
         )
+        return self._report_test(channel, result, **params)
 
-        if result.get("success"):
-            print("  ✓ Webhook notification test sent")
-        else:
-            print(f"  ✗ Failed: {result.get('error', result)}")
+    def test_push_notification(self) -> dict:
+        """Send a test push notification."""
+        return self._send_test("push")
 
-        return result
+    def test_webhook_notification(self, profile_id: int = 1) -> dict:
+        """Send a test notification via webhook provider."""
+        return self._send_test("webhook", profile_id=profile_id)
 
     def list_webhook_providers(self) -> dict:
         """List configured webhook providers."""
-        print("\n[WEBHOOK] Listing webhook providers...")
+        logger.info("\n[WEBHOOK] Listing webhook providers...")
 
         result = self._request(
             api="SYNO.Core.Notification.Push.Webhook.Provider",
@@ -154,110 +490,80 @@ class SynologyNotificationTrigger:
 
         if result.get("success"):
             providers = result.get("data", {}).get("list", [])
-            print(f"  ✓ Found {len(providers)} webhook provider(s)")
+            logger.info(f"  ✓ Found {len(providers)} webhook provider(s)")
             for p in providers:
-                print(f"    - {p.get('target_name')} (profile_id={p.get('profile_id')})")
+                logger.info(f"    - {p.get('target_name')} (profile_id={p.get('profile_id')})")
         else:
-            print(f"  ✗ Failed: {result.get('error', result)}")
+            logger.info(f"  ✗ Failed: {result.get('error', result)}")
 
         return result
 
     def test_mail_notification(self) -> dict:
         """Send a test email notification."""
-        print("\n[MAIL] Sending email notification test...")
-
-        result = self._request(
-            api="SYNO.Core.Notification.Mail",
-            path="entry.cgi",
-            method="send_test",
-            version=1
-        )
-
-        if result.get("success"):
-            print("  ✓ Email notification test sent")
-        else:
-            print(f"  ✗ Failed: {result.get('error', result)}")
-
-        return result
+        return self._send_test("mail")
 
     def test_sms_notification(self) -> dict:
         """Send a test SMS notification."""
-        print("\n[SMS] Sending SMS notification test...")
-
-        result = self._request(
-            api="SYNO.Core.Notification.SMS",
-            path="entry.cgi",
-            method="send_test",
-            version=1
-        )
-
-        if result.get("success"):
-            print("  ✓ SMS notification test sent")
-        else:
-            print(f"  ✗ Failed: {result.get('error', result)}")
-
-        return result
+        return self._send_test("sms")
 
     def get_notification_config(self) -> dict:
         """Get current notification configuration."""
-        print("\n[CONFIG] Getting notification configuration...")
-
-        configs = {}
-
-        # Push config
-        result = self._request(
-            api="SYNO.Core.Notification.Push.Conf",
-            path="entry.cgi",
-            method="get",
-            version=1
-        )
-        configs["push"] = result
-
-        # Mail config
-        result = self._request(
-            api="SYNO.Core.Notification.Mail.Conf",
-            path="entry.cgi",
-            method="get",
-            version=1
-        )
-        configs["mail"] = result
-
-        # Webhook config (if available)
-        result = self._request(
-            api="SYNO.Core.Notification.Webhook",
-            path="entry.cgi",
-            method="list",
-            version=1
-        )
-        configs["webhook"] = result
-
-        return configs
+        logger.info("\n[CONFIG] Getting notification configuration...")
+
+        return self._run_parallel({
+            "push": functools.partial(
+                self._request,
+                api="SYNO.Core.Notification.Push.Conf",
+                path="entry.cgi",
+                method="get",
+                version=1
+            ),
+            "mail": functools.partial(
+                self._request,
+                api="SYNO.Core.Notification.Mail.Conf",
+                path="entry.cgi",
+                method="get",
+                version=1
+            ),
+            "sms": functools.partial(
+                self._request,
+                api="SYNO.Core.Notification.SMS.Conf",
+                path="entry.cgi",
+                method="get",
+                version=1
+            ),
+            # Webhook config (if available)
+            "webhook": functools.partial(
+                self._request,
+                api="SYNO.Core.Notification.Webhook",
+                path="entry.cgi",
+                method="list",
+                version=1
+            ),
+        })
 
     def get_active_notifications(self) -> dict:
         """Get active/pending notifications."""
-        print("\n[ACTIVE] Getting active notifications...")
-
         result = self._request(
             api="SYNO.Core.DSMNotify",
             path="entry.cgi",
             method="notify",
             version=1,
-            action="load"
+            params=(("action", "load"),)
         )
 
+        header = "\n[ACTIVE] Getting active notifications..."
         if result.get("success"):
             data = result.get("data", {})
             count = len(data.get("items", []))
-            print(f"  ✓ Found {count} active notifications")
+            logger.info(f"{header}\n  ✓ Found {count} active notifications")
         else:
-            print(f"  ✗ Failed: {result.get('error', result)}")
+            logger.info(f"{header}\n  ✗ Failed: {result.get('error', result)}")
 
         return result
 
     def get_system_health(self) -> dict:
         """Get system health status."""
-        print("\n[HEALTH] Getting system health...")
-
         result = self._request(
             api="SYNO.Core.System.Status",
             path="entry.cgi",
@@ -265,16 +571,17 @@ class SynologyNotificationTrigger:
             version=1
         )
 
+        header = "\n[HEALTH] Getting system health..."
         if result.get("success"):
-            print("  ✓ System health retrieved")
+            logger.info(f"{header}\n  ✓ System health retrieved")
         else:
-            print(f"  ✗ Failed: {result.get('error', result)}")
+            logger.info(f"{header}\n  ✗ Failed: {result.get('error', result)}")
 
         return result
 
     def list_backup_tasks(self) -> dict:
         """List Hyper Backup tasks."""
-        print("\n[BACKUP] Listing backup tasks...")
+        logger.info("\n[BACKUP] Listing backup tasks...")
 
         result = self._request(
             api="SYNO.Backup.Task",
@@ -285,41 +592,117 @@ class SynologyNotificationTrigger:
 
         if result.get("success"):
             tasks = result.get("data", {}).get("task_list", [])
-            print(f"  ✓ Found {len(tasks)} backup tasks")
+            logger.info(f"  ✓ Found {len(tasks)} backup tasks")
             for task in tasks:
-                print(f"    - {task.get('name', 'Unknown')} (ID: {task.get('task_id')})")
+                logger.info(f"    - {task.get('name', 'Unknown')} (ID: {task.get('task_id')})")
         else:
-            print(f"  ✗ Failed: {result.get('error', result)}")
+            logger.info(f"  ✗ Failed: {result.get('error', result)}")
 
         return result
 
     def discover_notification_apis(self) -> list:
         """Discover available notification-related APIs."""
-        print("\n[DISCOVER] Discovering notification APIs...")
+        logger.info("\n[DISCOVER] Discovering notification APIs...")
+
+        # Stream the full listing, keeping (and caching) only the matching entries
+        api_info = self._cache_load("notification_apis")
+        if api_info is None:
+            api_info = self._request_streaming(
+                api="SYNO.API.Info",
+                path="query.cgi",
+                method="query",
+                version=1,
+                params=(("query", "all"),),
+                keep=_NOTIF_RE
+            )
+            if api_info.get("success"):
+                self._cache_store("notification_apis", api_info)
 
-        api_info = self.get_api_info()
         if not api_info.get("success"):
-            print("  ✗ Could not get API info")
+            logger.info("  ✗ Could not get API info")
             return []
 
-        notification_apis = []
-        for api_name, api_data in api_info.get("data", {}).items():
-            if any(keyword in api_name.lower() for keyword in ["notif", "alert", "push", "mail", "sms", "webhook"]):
-                notification_apis.append({
-                    "name": api_name,
-                    "path": api_data.get("path"),
-                    "minVersion": api_data.get("minVersion"),
-                    "maxVersion": api_data.get("maxVersion")
-                })
-
-        print(f"  ✓ Found {len(notification_apis)} notification-related APIs:")
-        for api in notification_apis:
-            print(f"    - {api['name']} (v{api['minVersion']}-{api['maxVersion']})")
+        notification_apis = [
+            {
+                "name": api_name,
+                "path": api_data.get("path"),
+                "minVersion": api_data.get("minVersion"),
+                "maxVersion": api_data.get("maxVersion")
+            }
+            for api_name, api_data in api_info.get("data", {}).items()
+            if _NOTIF_RE(api_name)
+        ]
+
+        logger.info("\n".join([
+            f"  ✓ Found {len(notification_apis)} notification-related APIs:",
+            *(f"    - {api['name']} (v{api['minVersion']}-{api['maxVersion']})" for api in notification_apis)
+        ]))
 
         return notification_apis
 
+    def _compound_notification_tests(self, tests: list[tuple[str, str, dict]]) -> Optional[dict]:
+        """
+        Send notification channel tests, batched into one compound request.
+
+        Args:
+            tests: (label, channel, params) for each test
+
+        Returns:
+            dict: label -> result, or None if the NAS doesn't support compound
+            requests (error 103) and the tests must be sent one by one
+        """
+        if not tests:
+            return {}
+
+        compound = self._compound_request([
+            {"api": NOTIFICATION_TESTS[channel]["api"], "method": "send_test",
+             "version": NOTIFICATION_TESTS[channel]["version"], "params": params}
+            for _, channel, params in tests
+        ])
+
+        if compound.get("success"):
+            results = compound.get("data", {}).get("result", [])
+            missing = {"success": False, "error": "No result in compound response"}
+            return {
+                label: self._report_test(channel, results[i] if i < len(results) else missing, **params)
+                for i, (label, channel, params) in enumerate(tests)
+            }
+
+        error = compound.get("error")
+        if isinstance(error, dict) and error.get("code") == 103:
+            return None
+
+        # Any other failure (e.g. a timeout) may come after the NAS already
+        # ran the batch, so report it rather than sending every test twice
+        return {
+            label: self._report_test(channel, {"success": False, "error": error}, **params)
+            for label, channel, params in tests
+        }
+
+    def _send_notification_tests(self, tests: list[tuple[str, str, dict]], delay: float) -> dict:
+        """
+        Send notification channel tests one by one, concurrently.
+
+        Args:
+            tests: (label, channel, params) for each test
+            delay: stagger spread across the tests
+
+        Returns:
+            dict: label -> result
+        """
+        calls = {
+            label: functools.partial(self._send_test, channel, **params)
+            for label, channel, params in tests
+        }
+        return self._run_parallel(calls, stagger=delay / len(calls))
+
     def run_all_tests(self, delay: float = 2.0) -> dict:
-        """Run all notification tests."""
+        """
+        Run all notification tests.
+
+        The tests normally go out in one compound request. delay only staggers
+        the per-call fallback used when the NAS doesn't support compound requests.
+        """
         results = {
             "webhook": None,
             "push": None,
@@ -329,26 +712,44 @@ class SynologyNotificationTrigger:
             "active": None
         }
 
+        config = self.get_notification_config()
+
         # List webhook providers first
         providers = self.list_webhook_providers()
 
+        tests = []
+
         # Test webhook (this is the most reliable method)
         if providers.get("success"):
             provider_list = providers.get("data", {}).get("list", [])
             for provider in provider_list:
                 profile_id = provider.get("profile_id", 1)
-                results["webhook"] = self.test_webhook_notification(profile_id)
-                time.sleep(delay)
-
-        # Try other notification methods (may not be configured)
-        results["push"] = self.test_push_notification()
-        time.sleep(delay)
-
-        results["sms"] = self.test_sms_notification()
-        time.sleep(delay)
-
-        results["health"] = self.get_system_health()
-        results["active"] = self.get_active_notifications()
+                tests.append((f"webhook:{profile_id}", "webhook", {"profile_id": profile_id}))
+
+        # Try other notification methods, skipping any the NAS reports as
+        # switched off. If a channel's config couldn't be read, test it anyway.
+        for channel in ("push", "sms", "mail"):
+            conf = config.get(channel, {})
+            if conf.get("success") and conf.get("data", {}).get(NOTIFICATION_TESTS[channel]["enabled_flag"]) is False:
+                logger.info(f"\n[{channel.upper()}] Skipped: not enabled on the NAS")
+            else:
+                tests.append((channel, channel, {}))
+
+        # The channel tests and status probes don't depend on each other
+        outcomes = self._run_parallel({
+            "tests": functools.partial(self._compound_notification_tests, tests),
+            "health": self.get_system_health,
+            "active": self.get_active_notifications,
+        })
+
+        test_results = outcomes.pop("tests")
+        if test_results is None:
+            # Sent after the probes rather than from inside their pool, so no
+            # more than MAX_WORKERS requests share the connection pool at once
+            test_results = self._send_notification_tests(tests, delay)
+
+        for label, result in {**test_results, **outcomes}.items():
+            results[label.split(":")[0]] = result
 
         return results
 
@@ -380,7 +781,11 @@ Examples:
     parser.add_argument("--secure", "-s", action="store_true", help="Use HTTPS")
     parser.add_argument("--discover", action="store_true", help="Discover available APIs")
     parser.add_argument("--config", action="store_true", help="Show notification configuration")
-    parser.add_argument("--delay", "-d", type=float, default=2.0, help="Delay between tests (default: 2s)")
+    parser.add_argument("--delay", "-d", type=float, default=2.0,
+                        help="Seconds to spread tests over when sent one by one, on DSM without "
+                             "compound request support; unused otherwise (default: 2s)")
+    parser.add_argument("--compat", action="store_true",
+                        help="Send API calls through requests instead of urllib3 directly")
 
     args = parser.parse_args()
 
@@ -392,34 +797,41 @@ Examples:
     if not password:
         password = getpass.getpass(f"Enter password for {args.user}: ")
 
-    print("="*60)
-    print("Synology Notification Trigger (API Version)")
-    print("="*60)
-    print(f"Host: {args.host}:{port}")
-    print(f"User: {args.user}")
-    print(f"Secure: {args.secure}")
-    print("="*60)
-
-    # Create trigger instance
-    trigger = SynologyNotificationTrigger(
-        host=args.host,
-        port=port,
-        username=args.user,
-        password=password,
-        secure=args.secure
-    )
+    listener = start_logging()
 
-    # Login
-    if not trigger.login():
-        return 1
+    logger.info("="*60)
+    logger.info("Synology Notification Trigger (API Version)")
+    logger.info("="*60)
+    logger.info(f"Host: {args.host}:{port}")
+    logger.info(f"User: {args.user}")
+    logger.info(f"Secure: {args.secure}")
+    logger.info("="*60)
 
+    trigger = None
     try:
+        # Create trigger instance
+        trigger = SynologyNotificationTrigger(
+            host=args.host,
+            port=port,
+            username=args.user,
+            password=password,
+            secure=args.secure,
+            compat=args.compat
+        )
+
+        # Login
+        if not trigger.login():
+            return 1
+
         if args.discover:
             trigger.discover_notification_apis()
         elif args.config:
             config = trigger.get_notification_config()
-            print("\nNotification Configuration:")
-            print(json.dumps(config, indent=2))
+            logger.info("\nNotification Configuration:")
+            if orjson:
+                logger.info(orjson.dumps(config, option=orjson.OPT_INDENT_2).decode())
+            else:
+                logger.info(json.dumps(config, indent=2))
         else:
             # Run all tests
             results = trigger.run_all_tests(delay=args.delay)
@@ -428,16 +840,23 @@ Examples:
             trigger.list_backup_tasks()
 
             # Summary
-            print("\n" + "="*60)
-            print("Summary")
-            print("="*60)
-            success_count = sum(1 for r in results.values() if r and r.get("success"))
-            print(f"  Tests completed: {len(results)}")
-            print(f"  Successful: {success_count}")
-            print("\nCheck your n8n webhook to see captured alerts!")
+            logger.info("\n" + "="*60)
+            logger.info("Summary")
+            logger.info("="*60)
+            completed = {name: r for name, r in results.items() if r is not None}
+            skipped = [name for name, r in results.items() if r is None]
+            success_count = sum(1 for r in completed.values() if r.get("success"))
+            logger.info(f"  Tests completed: {len(completed)}")
+            logger.info(f"  Successful: {success_count}")
+            if skipped:
+                logger.info(f"  Skipped: {', '.join(skipped)}")
+            logger.info("\nCheck your n8n webhook to see captured alerts!")
 
     finally:
-        trigger.logout()
+        if trigger is not None:
+            trigger.logout()
+            trigger.close()
+        listener.stop()
 
     return 0
 